@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from typing import Any, Optional, Dict
 from typing_extensions import Protocol
 
@@ -11,6 +12,47 @@ from sunode.basic import lib, ffi
 from sunode.dtypesubset import as_nested, DTypeSubset
 
 
+class LazyFlatSolution(Mapping):
+    """Nested, lazily unpacked view of a flat ODE solution.
+
+    Behaves like the nested dict that `Problem.flat_solution_as_dict`
+    used to return, but the slice and reshape for each state variable
+    is only created when that variable is actually accessed. Models
+    that observe only a few of many states then never build the unused
+    views.
+    """
+
+    def __init__(self, solution: Any, tree: Dict[str, Any]) -> None:
+        self._solution = solution
+        self._tree = tree
+        self._cache: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._cache:
+            return self._cache[name]
+        entry = self._tree[name]
+        if isinstance(entry, dict):
+            value: Any = LazyFlatSolution(self._solution, entry)
+        else:
+            flat_slice, shape = entry
+            value = self._solution[:, flat_slice].reshape(shape)
+        self._cache[name] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._tree)
+
+    def __len__(self) -> int:
+        return len(self._tree)
+
+    def copy(self) -> Dict[str, Any]:
+        """Materialize the solution as a plain nested dict."""
+        return {
+            name: value.copy() if isinstance(value, LazyFlatSolution) else value
+            for name, value in self.items()
+        }
+
+
 class Problem(Protocol):
     params_dtype: np.dtype
     params_subset: DTypeSubset
@@ -24,10 +66,10 @@ class Problem(Protocol):
     def make_rhs_jac_dense(self):  # type: ignore
         return NotImplemented
 
-    def make_rhs_sparse_jac_template(self) -> Sparse:
+    def make_rhs_sparse_jac_template(self, *, format: str = 'csc') -> Sparse:
         return NotImplemented
 
-    def make_rhs_jac_sparse(self):  # type: ignore
+    def make_rhs_jac_sparse(self, *, format: str = 'csc'):  # type: ignore
         return NotImplemented
 
     def make_rhs_jac_band(self):  # type: ignore
@@ -144,14 +186,17 @@ class Problem(Protocol):
 
         return data
 
-    def flat_solution_as_dict(self, solution: np.ndarray) -> Dict[str, Any]:
-        slices = self.state_subset.flat_slices
-        shapes = self.state_subset.flat_shapes
-        flat_views = {}
-        for path in self.state_subset.paths:
-            shape = (-1,) + shapes[path]
-            flat_views[path] = solution[:, slices[path]].reshape(shape)
-        return as_nested(flat_views)
+    def flat_solution_as_dict(self, solution: np.ndarray) -> Mapping:
+        tree = getattr(self, '_flat_solution_tree', None)
+        if tree is None:
+            slices = self.state_subset.flat_slices
+            shapes = self.state_subset.flat_shapes
+            tree = as_nested({
+                path: (slices[path], (-1,) + shapes[path])
+                for path in self.state_subset.paths
+            })
+            self._flat_solution_tree = tree
+        return LazyFlatSolution(solution, tree)
 
     def make_sundials_rhs(self) -> Any:
         rhs = self.make_rhs()
@@ -382,15 +427,36 @@ class Problem(Protocol):
 
         return jac_dense_wrapper
 
-    def make_sundials_jac_sparse(self, format='CSR'):  # type: ignore
-        jac_sparse = self.make_jac_sparse(format=format)
+    def make_sundials_jac_sparse(self, template=None, format=None):  # type: ignore
+        if template is None:
+            template = self.make_rhs_sparse_jac_template()
+            if template is NotImplemented:
+                raise ValueError(
+                    'Problem does not provide a sparse jacobian template.'
+                )
+        if format is None:
+            format = template.format
+        jac_sparse = self.make_rhs_jac_sparse(format=format)
+        if jac_sparse is NotImplemented:
+            raise ValueError('Problem does not implement make_rhs_jac_sparse.')
 
         user_dtype = self.user_data_dtype
         state_dtype = self.state_dtype
 
-        N_VGetArrayPointer = lib.N_VGetArrayPointer
-        N_VGetLength = lib.N_VGetLength
+        N_VGetArrayPointer = lib.N_VGetArrayPointer_Serial
+        N_VGetLength = lib.N_VGetLength_Serial
         SUNSparseMatrix_Data = lib.SUNSparseMatrix_Data
+        SUNSparseMatrix_IndexValues = lib.SUNSparseMatrix_IndexValues
+        SUNSparseMatrix_IndexPointers = lib.SUNSparseMatrix_IndexPointers
+
+        # The linear solver interface zeroes the whole matrix, including
+        # the index arrays, before calling the jacobian function, so the
+        # callback has to restore the sparsity pattern along with the
+        # data.
+        indptr = template.indptr.copy()
+        indices = template.indices.copy()
+        nnz = template.nnz
+        n_ptrs = len(indptr)
 
         user_ndtype = numba.from_dtype(user_dtype)
         user_ndtype_p = numba.types.CPointer(user_ndtype)
@@ -401,19 +467,29 @@ class Problem(Protocol):
         func_type = func_type.return_type(*args)
 
         @numba.cfunc(func_type)
-        def jac_dense_wrapper(t, y_, fy_, out_, user_data_, tmp1_, tmp2_, tmp3_):  # type: ignore
+        def jac_sparse_wrapper(t, y_, fy_, out_, user_data_, tmp1_, tmp2_, tmp3_):  # type: ignore
             n_vars = N_VGetLength(y_)
             y_ptr = N_VGetArrayPointer(y_)
-            out_ptr = SUNSparseMatrix_Data(out_)
             fy_ptr = N_VGetArrayPointer(fy_)
+            data_ptr = SUNSparseMatrix_Data(out_)
+            indptr_ptr = SUNSparseMatrix_IndexPointers(out_)
+            indices_ptr = SUNSparseMatrix_IndexValues(out_)
+
             y = numba.carray(y_ptr, (n_vars,)).view(state_dtype)[0]
-            out = numba.farray(out_ptr, (n_vars, n_vars))
             fy = numba.carray(fy_ptr, (n_vars,))
+            data = numba.carray(data_ptr, (nnz,))
+            out_indptr = numba.carray(indptr_ptr, (n_ptrs,))
+            out_indices = numba.carray(indices_ptr, (nnz,))
             user_data = numba.carray(user_data_, (1,), user_dtype)[0]
 
-            return jac_sparse(out, t, y, fy, user_data)
+            for i in range(n_ptrs):
+                out_indptr[i] = indptr[i]
+            for i in range(nnz):
+                out_indices[i] = indices[i]
 
-        return jac_dense_wrapper
+            return jac_sparse(data, t, y, fy, user_data)
+
+        return jac_sparse_wrapper
 
     def make_sundials_jac_prod(self):  # type: ignore
         jac_prod = self.make_rhs_jac_prod()
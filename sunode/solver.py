@@ -2,6 +2,7 @@ from typing import overload, Union, Optional, Callable, Dict, Any
 import logging
 import weakref
 
+import numba
 import numpy as np
 import xarray as xr
 
@@ -22,6 +23,115 @@ class SolverError(RuntimeError):
     pass
 
 
+_CVode = lib.CVode
+_CVodeF = lib.CVodeF
+_CVodeB = lib.CVodeB
+_CVodeGetB = lib.CVodeGetB
+_CVodeGetQuadB = lib.CVodeGetQuadB
+_CVodeGetSens = lib.CVodeGetSens
+_CVodeReInit = lib.CVodeReInit
+_CVodeReInitB = lib.CVodeReInitB
+_CVodeQuadReInitB = lib.CVodeQuadReInitB
+_CVodeAdjReInit = lib.CVodeAdjReInit
+_CVodeSensReInit = lib.CVodeSensReInit
+_CV_NORMAL = lib.CV_NORMAL
+
+# With the Python-level CV_TOO_MUCH_WORK retry loops gone, give
+# sundials an internal step budget large enough that the error only
+# fires for genuinely stuck integrations.
+_MAX_NUM_STEPS = 10_000_000
+
+
+@numba.njit
+def _cvode_loop(ode, t0, tvals, state_ptr, state_data, time_p, y0, y_out):
+    # The time stepping loop of `Solver.solve`, compiled so that each
+    # output time costs one direct call into sundials instead of a
+    # Python frame. Returns `(retcode, i)`, where `i` is the index of
+    # the output time that failed, or -1. The solvers configure a large
+    # CVodeSetMaxNumSteps budget, so CV_TOO_MUCH_WORK is an error here
+    # instead of a retry.
+    time = numba.carray(time_p, (1,))
+    for i in range(len(tvals)):
+        t = tvals[i]
+        if t == t0:
+            y_out[i, :] = y0
+            continue
+
+        retval = _CVode(ode, t, state_ptr, time_p, _CV_NORMAL)
+        if retval != 0:
+            return retval, i
+        assert time[0] == t
+
+        y_out[i, :] = state_data
+    return 0, -1
+
+
+@numba.njit
+def _cvode_sens_loop(
+    ode, t0, tvals, state_ptr, state_data, time_p, yS, sens_storage,
+    y0, y_out, sens0, sens_out
+):
+    # As `_cvode_loop`, but also extracts the forward sensitivities
+    # after each successful step. `sens_storage` aliases the data of
+    # the N_Vectors in `yS`, so CVodeGetSens fills it in-place.
+    time = numba.carray(time_p, (1,))
+    for i in range(len(tvals)):
+        t = tvals[i]
+        if t == t0:
+            y_out[i, :] = y0
+            sens_out[i, :, :] = sens0
+            continue
+
+        retval = _CVode(ode, t, state_ptr, time_p, _CV_NORMAL)
+        if retval != 0:
+            return retval, i
+        assert time[0] == t
+
+        y_out[i, :] = state_data
+
+        retval = _CVodeGetSens(ode, time_p, yS)
+        if retval != 0:
+            return retval, i
+        sens_out[i, :, :] = sens_storage
+    return 0, -1
+
+
+@numba.njit
+def _cvode_f_loop(ode, t0, tvals, state_ptr, state_data, time_p, n_check, y0, y_out):
+    # The time stepping loop of `solve_forward`, using the
+    # checkpointing variant CVodeF. Return values as in `_cvode_loop`.
+    time = numba.carray(time_p, (1,))
+    for i in range(len(tvals)):
+        t = tvals[i]
+        if t == t0:
+            y_out[i, :] = y0
+            continue
+
+        retval = _CVodeF(ode, t, state_ptr, time_p, _CV_NORMAL, n_check)
+        if retval != 0:
+            return retval, i
+        assert time[0] == t
+
+        y_out[i, :] = state_data
+    return 0, -1
+
+
+def _copy_into(target: np.ndarray, values: np.ndarray) -> None:
+    # Copy with ffi.memmove when both sides are contiguous float64 of
+    # the same shape (the common case for y0 and sens0), skipping
+    # numpy's assignment dispatch.
+    if (
+        isinstance(values, np.ndarray)
+        and values.dtype == np.float64
+        and values.flags.c_contiguous
+        and target.flags.c_contiguous
+        and values.shape == target.shape
+    ):
+        ffi.memmove(ffi.from_buffer(target), ffi.from_buffer(values), values.nbytes)
+    else:
+        target[:] = values
+
+
 class BaseSolver(Borrows):
     problem: Problem
     user_data: np.ndarray
@@ -56,8 +166,13 @@ class BaseSolver(Borrows):
         else:
             raise ValueError(f'Unknown solver {solver}.')
 
+        check(lib.CVodeSetMaxNumSteps(self.c_ptr, _MAX_NUM_STEPS))
+
         self._rhs = self.problem.make_sundials_rhs()
 
+        self._time_p = ffi.new('double*')
+        self._n_check = ffi.new('int*')
+
         def finalize(c_ptr: CPointer, release_borrowed: Callable[[], None]) -> None:
             if c_ptr == ffi.NULL:
                 logger.warn("Trying to free Solver, but it is NULL.")
@@ -115,7 +230,7 @@ class BaseSolver(Borrows):
     def make_output_buffers(self, tvals: np.ndarray) -> np.ndarray:
         n_states = self.problem.n_states
         n_params = self.problem.n_params
-        y_vals = np.zeros((len(tvals), n_states))
+        y_vals = np.empty((len(tvals), n_states))
         return y_vals
 
     def as_xarray(
@@ -139,40 +254,43 @@ class BaseSolver(Borrows):
         forward_sens: Optional[np.ndarray] = None,
         checkpointing: bool = False
     ) -> None:
-        CVodeReInit = lib.CVodeReInit
-        CVodeAdjReInit = lib.CVodeAdjReInit
-        CVodeF = lib.CVodeF
         ode = self.c_ptr
-        TOO_MUCH_WORK = lib.CV_TOO_MUCH_WORK
 
         state_data = self._state_buffer.data
         state_c_ptr = self._state_buffer.c_ptr
 
         if y0.dtype == self._problem.state_dtype:
             y0 = y0[None].view(np.float64)
-        state_data[:] = y0
+        _copy_into(state_data, y0)
+
+        tvals = np.asarray(tvals, dtype=np.float64)
 
-        time_p = ffi.new('double*')
+        time_p = self._time_p
         time_p[0] = t0
 
-        n_check = ffi.new('int*')
+        n_check = self._n_check
         n_check[0] = 0
 
-        check(CVodeReInit(ode, t0, state_c_ptr))
-        check(CVodeAdjReInit(ode))
-
-        for i, t in enumerate(tvals):
-            if t == t0:
-                y_out[0, :] = y0
-                continue
+        check(_CVodeReInit(ode, t0, state_c_ptr))
+        check(_CVodeAdjReInit(ode))
+
+        if tvals.shape[0] == 1 and tvals[0] != t0:
+            # Single observation time: one call, no loop scaffolding.
+            retval = _CVodeF(ode, tvals[0], state_c_ptr, time_p, _CV_NORMAL, n_check)
+            if retval != 0:
+                raise SolverError("Bad sundials return code while solving ode: %s (%s)"
+                                  % (ERRORS[retval], retval))
+            y_out[0, :] = state_data
+            self.mark_changed(False)
+            return
 
-            retval = TOO_MUCH_WORK
-            while retval == TOO_MUCH_WORK:
-                retval = CVodeF(ode, t, state_c_ptr, time_p, lib.CV_NORMAL, n_check)
-                if retval != TOO_MUCH_WORK and retval != 0:
-                    raise SolverError("Bad sundials return code while solving ode: %s (%s)"
-                                      % (ERRORS[retval], retval))
-            y_out[i, :] = state_data
+        retval, _ = _cvode_f_loop(
+            ode, t0, tvals, state_c_ptr, state_data,
+            time_p, n_check, y0, y_out,
+        )
+        if retval != 0:
+            raise SolverError("Bad sundials return code while solving ode: %s (%s)"
+                              % (ERRORS[retval], retval))
 
         self.mark_changed(False)
 
@@ -222,9 +340,15 @@ class Solver:
         rhs = self._problem.make_sundials_rhs()
         self._rhs = rhs
         check(lib.CVodeInit(self._ode, rhs.cffi, 0., self._state_buffer.c_ptr))
+        check(lib.CVodeSetMaxNumSteps(self._ode, _MAX_NUM_STEPS))
+
+        # `from_buffer` already points at the start of the array, no
+        # need for an extra `addressof`. The cdata keeps the buffer
+        # alive together with the solver.
+        self._user_data_p = ffi.cast('void *', ffi.from_buffer(self._user_data.data))
+        check(lib.CVodeSetUserData(self._ode, self._user_data_p))
 
-        user_data_p = ffi.cast('void *', ffi.addressof(ffi.from_buffer(self._user_data.data)))
-        check(lib.CVodeSetUserData(self._ode, user_data_p))
+        self._time_p = ffi.new('double*')
 
         self._set_tolerances(self._abstol, self._reltol)
         if self._constraints is not None:
@@ -239,6 +363,14 @@ class Solver:
             sens_rhs = self._problem.make_sundials_sensitivity_rhs()
             self._init_sens(sens_rhs, self._sens_mode)
 
+        # Pick the stepping loop once. Numba compiles one specialization
+        # per argument signature and shares it between solver instances,
+        # so this is the construction-time dispatch point.
+        if self._compute_sens:
+            self._stepper = _cvode_sens_loop
+        else:
+            self._stepper = _cvode_loop
+
     def __init__(
             self,
             problem: Problem,
@@ -269,8 +401,11 @@ class Solver:
             to the number of states. See the SUNDIALS documentation for the [constraint options][2].
         solver: {"BDF", "ADAMS"}, optional
             Algorithm for solving the ODE (the default is ``"BDF"``).
-        linear_solver: {"dense", "dense_finitediff", "spgmr", "spgmr_finitediff", "band"}, optional
+        linear_solver: {"dense", "dense_finitediff", "spgmr", "spgmr_finitediff", "band", "klu"}, optional
             Type of linear solver to use (the default is "dense").
+            If linear_solver is ``"klu"``, the problem must provide a sparse
+            jacobian template, and the per-step factorization cost scales
+            with the number of nonzeros instead of ``n_states ** 3``.
             If linear_solver is ``"band"``, ``linear_solver_kwargs`` must contain ``lower_bandwidth``
             and ``upper_bandwidth``, defining the lower and upper half-bandwidth of the banded matrix
             (see the [SUNDIALS documentation][3] for details).
@@ -346,6 +481,20 @@ class Solver:
             check(lib.SUNLinSolInitialize_SPGMR(linsolver))
             jac_prod = self._problem.make_sundials_jac_prod()
             check(lib.CVodeSetJacTimes(self._ode, ffi.NULL, jac_prod.cffi))
+        elif linear_solver == "klu":
+            jac = self._problem.make_rhs_sparse_jac_template()
+            if jac is NotImplemented:
+                raise ValueError(
+                    "Problem does not provide a sparse jacobian template, "
+                    "which the klu linear solver requires."
+                )
+            self._jac_template = jac
+            linsolver = check(lib.SUNLinSol_KLU(self._state_buffer.c_ptr, jac.c_ptr))
+            check(lib.CVodeSetLinearSolver(self._ode, linsolver, jac.c_ptr))
+
+            self._jac_func = self._problem.make_sundials_jac_sparse(
+                template=jac, format=jac.format)
+            check(lib.CVodeSetJacFn(self._ode, self._jac_func.cffi))
         elif linear_solver == "band":
             upper_bandwidth = kwargs.get("upper_bandwidth", None)
             lower_bandwidth = kwargs.get("lower_bandwidth", None)
@@ -370,12 +519,20 @@ class Solver:
         self._sens_mode = sens_mode
 
         n_params = self._problem.n_params
-        yS = check(lib.N_VCloneVectorArray(n_params, self._state_buffer.c_ptr))
-        vecs = [sunode.vector.Vector(yS[i]) for i in range(n_params)]
-        for vec in vecs:
-            vec.data[:] = 0
-        self._sens_buffer_array = yS
-        self._sens_buffers = vecs
+        n_states = self._problem.n_states
+
+        # One contiguous buffer for all sensitivities. Each N_Vector
+        # aliases one row, so reading all sensitivities out is a single
+        # contiguous copy instead of one copy per parameter. The buffers
+        # live as long as the solver and are reused if the sensitivity
+        # system is initialized again.
+        if not hasattr(self, '_sens_buffer_array'):
+            self._sens_storage = np.zeros((n_params, n_states))
+            vecs = [sunode.from_numpy(row) for row in self._sens_storage]
+            self._sens_array_owner = ffi.new('N_Vector[]', [vec.c_ptr for vec in vecs])
+            self._sens_buffer_array = ffi.cast('N_Vector *', self._sens_array_owner)
+            self._sens_buffers = vecs
+        yS = self._sens_buffer_array
 
         check(lib.CVodeSensInit(self._ode, n_params, sens_mode, sens_rhs.cffi, yS))
 
@@ -392,36 +549,52 @@ class Solver:
         check(lib.CVodeSetSensErrCon(self._ode, 1))  # TODO
 
     def _set_tolerances(self, atol=None, rtol=None):
-        atol = np.array(atol)
-        rtol = np.array(rtol)
+        atol_ndim = np.ndim(atol)
+        rtol_ndim = np.ndim(rtol)
         n_states = self._problem.n_states
-        if atol.ndim == 1 and rtol.ndim == 1:
-            atol = sunode.from_numpy(atol)
-            rtol = sunode.from_numpy(rtol)
+        if atol_ndim == 1 and rtol_ndim == 1:
+            atol = sunode.from_numpy(np.asarray(atol))
+            rtol = sunode.from_numpy(np.asarray(rtol))
             assert atol.shape == (n_states,)
             assert rtol.shape == (n_states,)
             check(lib.CVodeVVtolerances(self._ode, rtol.c_ptr, atol.c_ptr))
-        elif atol.ndim == 1 and rtol.ndim == 0:
-            atol = sunode.from_numpy(atol)
+        elif atol_ndim == 1 and rtol_ndim == 0:
+            atol = sunode.from_numpy(np.asarray(atol))
             assert atol.shape == (n_states,)
             check(lib.CVodeSVtolerances(self._ode, rtol, atol.c_ptr))
-        elif atol.ndim == 0 and rtol.ndim == 1:
-            rtol = sunode.from_numpy(rtol)
+        elif atol_ndim == 0 and rtol_ndim == 1:
+            rtol = sunode.from_numpy(np.asarray(rtol))
             assert rtol.shape == (n_states,)
             check(lib.CVodeVStolerances(self._ode, rtol.c_ptr, atol))
-        elif atol.ndim == 0 and rtol.ndim == 0:
+        elif atol_ndim == 0 and rtol_ndim == 0:
             check(lib.CVodeSStolerances(self._ode, rtol, atol))
         else:
             raise ValueError('Invalid tolerance.')
         self._atol = atol
         self._rtol = rtol
 
-    def make_output_buffers(self, tvals):
+    def make_output_buffers(self, tvals, sens_dtype=None):
+        """Allocate output buffers for `solve`.
+
+        Parameters
+        ----------
+        tvals : numpy.ndarray
+            The time points passed to `solve`.
+        sens_dtype : numpy.dtype, optional
+            Dtype of the sensitivity output buffer (default float64).
+            With loose tolerances (reltol >= 1e-6 or so) float32 loses
+            no meaningful accuracy but halves the memory traffic of the
+            sensitivity write-out, which dominates for small states.
+        """
         n_states = self._problem.n_states
         n_params = self._problem.n_params
-        y_vals = np.zeros((len(tvals), n_states))
+        # The solver overwrites every row, so skip the zero-fill and
+        # its extra pass over the buffers.
+        y_vals = np.empty((len(tvals), n_states))
         if self._compute_sens:
-            sens_vals = np.zeros((len(tvals), n_params, n_states))
+            if sens_dtype is None:
+                sens_dtype = np.float64
+            sens_vals = np.empty((len(tvals), n_params, n_states), dtype=sens_dtype)
             return y_vals, sens_vals
         return y_vals
 
@@ -446,6 +619,8 @@ class Solver:
 
     def set_params(self, params):
         self._problem.update_params(self._user_data, params)
+        self._last_deriv_bytes = self._last_fixed_bytes = None
+        self._last_forward_key = None
 
     def get_params(self):
         return self._problem.extract_params(self._user_data)
@@ -460,19 +635,47 @@ class Solver:
 
     def set_derivative_params(self, params):
         self._problem.update_subset_params(self._user_data, params)
+        self._last_deriv_bytes = None
+        self._last_forward_key = None
+
+    def set_derivative_params_raw(self, params):
+        """Set the derivative parameters from a flat float64 array.
+
+        Same as `set_derivative_params`, but accepts the values as
+        plain float64 array, so callers do not need to know the
+        structured subset dtype. Updates with unchanged values are
+        skipped.
+        """
+        vals = params.tobytes()
+        if vals == getattr(self, '_last_deriv_bytes', None):
+            return
+        params = params.view(self.derivative_params_dtype)[0]
+        self._problem.update_subset_params(self._user_data, params)
+        self._last_deriv_bytes = vals
+        self._last_forward_key = None
 
     def set_remaining_params(self, params):
         self._problem.update_remaining_params(self._user_data, params)
+        self._last_fixed_bytes = None
+        self._last_forward_key = None
+
+    def set_remaining_params_raw(self, params):
+        """Set the remaining parameters from a flat float64 array.
 
-    def solve(self, t0, tvals, y0, y_out, *, sens0=None, sens_out=None, max_retries=5):
+        Updates with unchanged values are skipped.
+        """
+        vals = params.tobytes()
+        if vals == getattr(self, '_last_fixed_bytes', None):
+            return
+        params = params.view(self.remainder_params_dtype)[0]
+        self._problem.update_remaining_params(self._user_data, params)
+        self._last_fixed_bytes = vals
+        self._last_forward_key = None
+
+    def solve(self, t0, tvals, y0, y_out, *, sens0=None, sens_out=None):
         if self._compute_sens and (sens0 is None or sens_out is None):
             raise ValueError('"sens_out" and "sens0" are required when computin sensitivities.')
-        CVodeReInit = lib.CVodeReInit
-        CVodeSensReInit = lib.CVodeSensReInit
-        CVode = lib.CVode
-        CVodeGetSens = lib.CVodeGetSens
         ode = self._ode
-        TOO_MUCH_WORK = lib.CV_TOO_MUCH_WORK
 
         n_params = self._problem.n_params
         n_states = self._problem.n_states
@@ -481,50 +684,98 @@ class Solver:
         state_c_ptr = self._state_buffer.c_ptr
 
         if self._compute_sens:
-            sens_buffer_array = self._sens_buffer_array
-            sens_data = tuple(buffer.data for buffer in self._sens_buffers)
-            for i in range(n_params):
-                sens_data[i][:] = sens0[i, :]
+            _copy_into(self._sens_storage, sens0)
 
         if y0.dtype == self._problem.state_dtype:
             y0 = y0[None].view(np.float64)
 
         if y0.shape != (n_states,):
             raise ValueError(f"y0 should have shape {(n_states,)} but has shape {y0.shape}.")
-        state_data[:] = y0
+        _copy_into(state_data, y0)
 
-        time_p = ffi.new('double*')
+        tvals = np.asarray(tvals, dtype=np.float64)
+
+        time_p = self._time_p
         time_p[0] = t0
 
-        check(CVodeReInit(ode, t0, state_c_ptr))
+        check(_CVodeReInit(ode, t0, state_c_ptr))
         if self._compute_sens:
-            check(CVodeSensReInit(ode, self._sens_mode, self._sens_buffer_array))
-
-        for i, t in enumerate(tvals):
-            if t == t0:
-                y_out[0, :] = y0
-                if self._compute_sens:
-                    sens_out[0, :, :] = sens0
-                continue
-
-            for retry in range(max_retries):
-                retval = CVode(ode, t, state_c_ptr, time_p, lib.CV_NORMAL)
-                if retval == 0:
-                    assert time_p[0] == t
-                    break
-                if retval != TOO_MUCH_WORK:
-                    error = ERRORS[retval]
-                    raise SolverError(f"Solving ode failed before time={t}: {error} ({retval})")
-            else:
-                raise SolverError(f"Too many solver retries before time={t}.")
+            check(_CVodeSensReInit(ode, self._sens_mode, self._sens_buffer_array))
+
+        if tvals.shape[0] == 1 and tvals[0] != t0:
+            # Single observation time (common for per-observation
+            # likelihood evaluations): one call, no loop scaffolding.
+            t = tvals[0]
+            retval = _CVode(ode, t, state_c_ptr, time_p, _CV_NORMAL)
+            if retval != 0:
+                error = ERRORS[retval]
+                raise SolverError(f"Solving ode failed before time={t}: {error} ({retval})")
+            y_out[0, :] = state_data
+            if self._compute_sens:
+                check(_CVodeGetSens(ode, time_p, self._sens_buffer_array))
+                sens_out[0, :, :] = self._sens_storage
+            return
+
+        if self._compute_sens:
+            retval, i = self._stepper(
+                ode, t0, tvals, state_c_ptr, state_data, time_p,
+                self._sens_buffer_array, self._sens_storage,
+                y0, y_out, sens0, sens_out,
+            )
+        else:
+            retval, i = self._stepper(
+                ode, t0, tvals, state_c_ptr, state_data,
+                time_p, y0, y_out,
+            )
+
+        if retval != 0:
+            error = ERRORS[retval]
+            raise SolverError(f"Solving ode failed before time={tvals[i]}: {error} ({retval})")
 
-            y_out[i, :] = state_data
+    def solve_many(self, t0, tvals, y0, y_out, *, params=None, sens0=None, sens_out=None):
+        """Solve a batch of initial value problems that share this solver.
 
+        All trajectories use the same output times and solver settings, so
+        the setup cost of the solver is paid once for the whole batch.
+
+        Parameters
+        ----------
+        t0 : float
+            Initial time for all trajectories.
+        tvals : numpy.ndarray
+            Times at which the solutions are stored.
+        y0 : numpy.ndarray with shape (n_batch, n_states)
+            One initial state per trajectory.
+        y_out : numpy.ndarray with shape (n_batch, len(tvals), n_states)
+            Output buffer, e.g. from ``make_output_buffers`` stacked along
+            a leading batch dimension.
+        params : sequence, optional
+            One parameter record per trajectory (as accepted by
+            ``set_params``). If missing, all trajectories use the current
+            parameters.
+        sens0, sens_out : numpy.ndarray, optional
+            Batched sensitivity initial values and output buffers, with a
+            leading batch dimension. Required when the solver computes
+            forward sensitivities.
+        """
+        n_batch = len(y0)
+        if len(y_out) != n_batch:
+            raise ValueError(f"y_out should have {n_batch} rows but has {len(y_out)}.")
+        if params is not None and len(params) != n_batch:
+            raise ValueError(f"params should have {n_batch} entries but has {len(params)}.")
+        if self._compute_sens and (sens0 is None or sens_out is None):
+            raise ValueError('"sens_out" and "sens0" are required when computing sensitivities.')
+
+        for k in range(n_batch):
+            if params is not None:
+                self.set_params(params[k])
             if self._compute_sens:
-                retval = CVodeGetSens(ode, time_p, sens_buffer_array)
-                if retval == 0:
-                    for j in range(n_params):
-                        sens_out[i, j, :] = sens_data[j]
+                self.solve(
+                    t0, tvals, y0[k], y_out[k],
+                    sens0=sens0[k], sens_out=sens_out[k],
+                )
+            else:
+                self.solve(t0, tvals, y0[k], y_out[k])
 
 
 class AdjointSolver:
@@ -539,6 +790,11 @@ class AdjointSolver:
         self._state_buffer = sunode.empty_vector(n_states)
         self._state_buffer.data[:] = 0
 
+        # The forward and backward systems need separate jacobian
+        # matrices: during solve_backward, CVODES re-integrates forward
+        # solution segments between checkpoints, so both linear solvers
+        # are active at the same time and each factors its matrix
+        # in-place and reuses that factorization across steps.
         self._jac = check(lib.SUNDenseMatrix(n_states, n_states))
         self._jacB = check(lib.SUNDenseMatrix(n_states, n_states))
 
@@ -564,6 +820,7 @@ class AdjointSolver:
 
         self._ode = check(lib.CVodeCreate(self._solver_type))
         check(lib.CVodeInit(self._ode, rhs.cffi, 0., self._state_buffer.c_ptr))
+        check(lib.CVodeSetMaxNumSteps(self._ode, _MAX_NUM_STEPS))
 
         self._set_tolerances(abstol, reltol)
         if self._constraints is not None:
@@ -573,8 +830,11 @@ class AdjointSolver:
 
         self._make_linsol()
 
-        user_data_p = ffi.cast('void *', ffi.addressof(ffi.from_buffer(self._user_data.data)))
-        check(lib.CVodeSetUserData(self._ode, user_data_p))
+        self._user_data_p = ffi.cast('void *', ffi.from_buffer(self._user_data.data))
+        check(lib.CVodeSetUserData(self._ode, self._user_data_p))
+
+        self._time_p = ffi.new('double*')
+        self._n_check = ffi.new('int*')
 
         if interpolation == 'polynomial':
             interpolation = lib.CV_POLYNOMIAL
@@ -594,6 +854,7 @@ class AdjointSolver:
 
         self._state_bufferB = sunode.empty_vector(self._problem.n_states)
         check(lib.CVodeInitB(self._ode, self._odeB, self._adj_rhs.cffi, 0., self._state_bufferB.c_ptr))
+        check(lib.CVodeSetMaxNumStepsB(self._ode, self._odeB, _MAX_NUM_STEPS))
 
         # TODO
         check(lib.CVodeSStolerancesB(self._ode, self._odeB, 1e-10, 1e-10))
@@ -604,8 +865,7 @@ class AdjointSolver:
         self._jac_funcB = self._problem.make_sundials_adjoint_jac_dense()
         check(lib.CVodeSetJacFnB(self._ode, self._odeB, self._jac_funcB.cffi))
 
-        user_data_p = ffi.cast('void *', ffi.addressof(ffi.from_buffer(self._user_data.data)))
-        check(lib.CVodeSetUserDataB(self._ode, self._odeB, user_data_p))
+        check(lib.CVodeSetUserDataB(self._ode, self._odeB, self._user_data_p))
 
         self._quad_buffer = sunode.empty_vector(self._problem.n_params)
         self._quad_buffer_out = sunode.empty_vector(self._problem.n_params)
@@ -622,12 +882,12 @@ class AdjointSolver:
         check(lib.CVodeSetJacFn(self._ode, self._jac_func.cffi))
 
     def _set_tolerances(self, atol=None, rtol=None):
-        atol = np.array(atol)
-        rtol = np.array(rtol)
-        if atol.ndim == 1 and rtol.ndim == 0:
-            atol = sunode.from_numpy(atol)
+        atol_ndim = np.ndim(atol)
+        rtol_ndim = np.ndim(rtol)
+        if atol_ndim == 1 and rtol_ndim == 0:
+            atol = sunode.from_numpy(np.asarray(atol))
             check(lib.CVodeSVtolerances(self._ode, rtol, atol.c_ptr))
-        elif atol.ndim == 0 and rtol.ndim == 0:
+        elif atol_ndim == 0 and rtol_ndim == 0:
             check(lib.CVodeSStolerances(self._ode, rtol, atol))
         else:
             raise ValueError('Invalid tolerance.')
@@ -635,7 +895,7 @@ class AdjointSolver:
         self._rtol = rtol
 
     def make_output_buffers(self, tvals):
-        y_vals = np.zeros((len(tvals), self._problem.n_states))
+        y_vals = np.empty((len(tvals), self._problem.n_states))
         grad_out = np.zeros(self._problem.n_params)
         lamda_out = np.zeros(self._problem.n_states)
         return y_vals, grad_out, lamda_out
@@ -661,6 +921,8 @@ class AdjointSolver:
 
     def set_params(self, params):
         self._problem.update_params(self._user_data, params)
+        self._last_deriv_bytes = self._last_fixed_bytes = None
+        self._last_forward_key = None
 
     def get_params(self):
         return self._problem.extract_params(self._user_data)
@@ -675,61 +937,101 @@ class AdjointSolver:
 
     def set_derivative_params(self, params):
         self._problem.update_subset_params(self._user_data, params)
+        self._last_deriv_bytes = None
+        self._last_forward_key = None
+
+    def set_derivative_params_raw(self, params):
+        """Set the derivative parameters from a flat float64 array.
+
+        Same as `set_derivative_params`, but accepts the values as
+        plain float64 array, so callers do not need to know the
+        structured subset dtype. Updates with unchanged values are
+        skipped.
+        """
+        vals = params.tobytes()
+        if vals == getattr(self, '_last_deriv_bytes', None):
+            return
+        params = params.view(self.derivative_params_dtype)[0]
+        self._problem.update_subset_params(self._user_data, params)
+        self._last_deriv_bytes = vals
+        self._last_forward_key = None
 
     def set_remaining_params(self, params):
         self._problem.update_remaining_params(self._user_data, params)
+        self._last_fixed_bytes = None
+        self._last_forward_key = None
+
+    def set_remaining_params_raw(self, params):
+        """Set the remaining parameters from a flat float64 array.
 
-    def solve_forward(self, t0, tvals, y0, y_out, *, max_retries=5):
-        CVodeReInit = lib.CVodeReInit
-        CVodeAdjReInit = lib.CVodeAdjReInit
-        CVodeF = lib.CVodeF
+        Updates with unchanged values are skipped.
+        """
+        vals = params.tobytes()
+        if vals == getattr(self, '_last_fixed_bytes', None):
+            return
+        params = params.view(self.remainder_params_dtype)[0]
+        self._problem.update_remaining_params(self._user_data, params)
+        self._last_fixed_bytes = vals
+        self._last_forward_key = None
+
+    def solve_forward(self, t0, tvals, y0, y_out):
         ode = self._ode
-        TOO_MUCH_WORK = lib.CV_TOO_MUCH_WORK
+
+        # Any forward solve replaces the stored checkpoints, so callers
+        # tracking a previous forward solve must not reuse them.
+        self._last_forward_key = None
+        self._forward_complete = False
 
         state_data = self._state_buffer.data
         state_c_ptr = self._state_buffer.c_ptr
 
         if y0.dtype == self._problem.state_dtype:
             y0 = y0[None].view(np.float64)
-        state_data[:] = y0
+        _copy_into(state_data, y0)
 
-        time_p = ffi.new('double*')
+        tvals = np.asarray(tvals, dtype=np.float64)
+
+        time_p = self._time_p
         time_p[0] = t0
 
-        n_check = ffi.new('int*')
+        n_check = self._n_check
         n_check[0] = 0
 
-        check(CVodeReInit(ode, t0, state_c_ptr))
-        check(CVodeAdjReInit(ode))
+        check(_CVodeReInit(ode, t0, state_c_ptr))
+        check(_CVodeAdjReInit(ode))
+
+        if tvals.shape[0] == 1 and tvals[0] != t0:
+            # Single observation time: one call, no loop scaffolding.
+            t = tvals[0]
+            retval = _CVodeF(ode, t, state_c_ptr, time_p, _CV_NORMAL, n_check)
+            if retval != 0:
+                error = ERRORS[retval]
+                raise SolverError(f"Solving ode failed before time={t}: {error} ({retval})")
+            y_out[0, :] = state_data
+            self._forward_complete = True
+            return
 
-        for i, t in enumerate(tvals):
-            if t == t0:
-                y_out[0, :] = y0
-                continue
+        retval, i = _cvode_f_loop(
+            ode, t0, tvals, state_c_ptr, state_data,
+            time_p, n_check, y0, y_out,
+        )
+        if retval != 0:
+            error = ERRORS[retval]
+            raise SolverError(f"Solving ode failed before time={tvals[i]}: {error} ({retval})")
+        self._forward_complete = True
 
-            for retry in range(max_retries):
-                retval = CVodeF(ode, t, state_c_ptr, time_p, lib.CV_NORMAL, n_check)
-                if retval == 0:
-                    assert time_p[0] == t
-                    break
-                if retval != TOO_MUCH_WORK:
-                    error = ERRORS[retval]
-                    raise SolverError(f"Solving ode failed before time={t}: {error} ({retval})")
-            else:
-                raise SolverError(f"Too many solver retries before time={t}.")
+    def has_forward_checkpoints(self):
+        """Return True if the last forward solve completed successfully.
 
-            y_out[i, :] = state_data
+        Only then do the internal CVODES checkpoints cover the full
+        time range required by `solve_backward`.
+        """
+        return getattr(self, '_forward_complete', False)
 
     def solve_backward(self, t0, tend, tvals, grads, grad_out, lamda_out,
-                       lamda_all_out=None, quad_all_out=None, max_retries=50):
-        CVodeReInitB = lib.CVodeReInitB
-        CVodeQuadReInitB = lib.CVodeQuadReInitB
-        CVodeGetQuadB = lib.CVodeGetQuadB
-        CVodeB = lib.CVodeB
-        CVodeGetB = lib.CVodeGetB
+                       lamda_all_out=None, quad_all_out=None):
         ode = self._ode
         odeB = self._odeB
-        TOO_MUCH_WORK = lib.CV_TOO_MUCH_WORK
 
         state_data = self._state_bufferB.data
         state_c_ptr = self._state_bufferB.c_ptr
@@ -740,36 +1042,39 @@ class AdjointSolver:
         quad_out_data = self._quad_buffer_out.data
         quad_out_c_ptr = self._quad_buffer_out.c_ptr
 
-        state_data[:] = 0
-        quad_data[:] = 0
-        quad_out_data[:] = 0
+        lib.N_VConst(0.0, state_c_ptr)
+        lib.N_VConst(0.0, quad_c_ptr)
+        lib.N_VConst(0.0, quad_out_c_ptr)
 
-        time_p = ffi.new('double*')
+        time_p = self._time_p
         time_p[0] = t0
 
-        ts = [t0] + list(tvals[::-1]) + [tend]
-        t_intervals = zip(ts[1:], ts[:-1])
-        grads = [None] + list(grads)
+        n_vals = len(tvals)
+        ts = np.empty(n_vals + 2)
+        ts[0] = t0
+        ts[1:-1] = tvals[::-1]
+        ts[-1] = tend
+        lowers = ts[1:]
+        uppers = ts[:-1]
+
+        for i in range(n_vals + 1):
+            t_lower = lowers[i]
+            t_upper = uppers[i]
+            grad = grads[n_vals - 1 - i] if i < n_vals else None
 
-        for i, ((t_lower, t_upper), grad) in enumerate(zip(t_intervals, reversed(grads))):
             if t_lower < t_upper:
-                check(CVodeReInitB(ode, odeB, t_upper, state_c_ptr))
-                check(CVodeQuadReInitB(ode, odeB, quad_c_ptr))
-
-                for retry in range(max_retries):
-                    retval = CVodeB(ode, t_lower, lib.CV_NORMAL)
-                    if retval == 0:
-                        break
-                    if retval != TOO_MUCH_WORK:
-                        error = ERRORS[retval]
-                        raise SolverError(f"Solving ode failed between time {t_upper} and "
-                                          f"{t_lower}: {error} ({retval})")
-                else:
-                    raise SolverError(f"Too many solver retries between time {t_upper} and {t_lower}.")
-
-                check(CVodeGetB(ode, odeB, time_p, state_c_ptr))
-                check(CVodeGetQuadB(ode, odeB, time_p, quad_out_c_ptr))
-                quad_data[:] = quad_out_data[:]
+                check(_CVodeReInitB(ode, odeB, t_upper, state_c_ptr))
+                check(_CVodeQuadReInitB(ode, odeB, quad_c_ptr))
+
+                retval = _CVodeB(ode, t_lower, _CV_NORMAL)
+                if retval != 0:
+                    error = ERRORS[retval]
+                    raise SolverError(f"Solving ode failed between time {t_upper} and "
+                                      f"{t_lower}: {error} ({retval})")
+
+                check(_CVodeGetB(ode, odeB, time_p, state_c_ptr))
+                check(_CVodeGetQuadB(ode, odeB, time_p, quad_out_c_ptr))
+                np.copyto(quad_data, quad_out_data)
                 assert time_p[0] == t_lower, (time_p[0], t_lower)
 
             if grad is not None:
@@ -780,5 +1085,5 @@ class AdjointSolver:
                 if quad_all_out is not None:
                     quad_all_out[-i, :] = quad_data
 
-        grad_out[:] = quad_out_data
-        lamda_out[:] = state_data
+        np.copyto(grad_out, quad_out_data)
+        np.copyto(lamda_out, state_data)
@@ -10,7 +10,9 @@ import numba
 import xarray as xr
 import pandas as pd
 
-from sunode import problem, basic, dtypesubset
+from scipy import sparse as scipy_sparse
+
+from sunode import problem, basic, dtypesubset, matrix
 from sunode.symode.lambdify import lambdify_consts
 
 
@@ -370,6 +372,63 @@ class SympyProblem(problem.Problem):
 
         return jac_dense
 
+    def _jac_sparsity(self) -> np.ndarray:
+        return np.array(
+            [[expr != 0 for expr in row] for row in self._sym_dydt_jac],
+            dtype=bool,
+        )
+
+    def make_rhs_sparse_jac_template(self, *, format='csc') -> matrix.Sparse:
+        return matrix.empty_matrix(
+            self._sym_dydt_jac.shape,
+            'sparse',
+            format=format,
+            sparsity=self._jac_sparsity(),
+        )
+
+    def make_rhs_jac_sparse(self, *, format='csc', debug=False):  # type: ignore
+        jac = self._sym_dydt_jac
+        sparsity = self._jac_sparsity()
+        if format == 'csr':
+            spmat = scipy_sparse.csr_matrix(sparsity)
+        elif format == 'csc':
+            spmat = scipy_sparse.csc_matrix(sparsity)
+        else:
+            raise ValueError('Format must be one of csr and csc.')
+
+        # tocoo keeps the entries in storage order, so the generated
+        # function fills the data array of the sparse matrix directly.
+        coo = spmat.tocoo()
+        exprs = np.array([jac[i, j] for i, j in zip(coo.row, coo.col)])
+
+        jac_calc = lambdify_consts(
+            "_jac_sparse",
+            argnames=['time', 'state', 'params'],
+            expr=self._simplify(exprs),
+            varmap=self._varmap,
+            debug=debug,
+        )
+
+        if self.params_dtype.itemsize:
+            @numba.njit(inline='always')
+            def jac_sparse(out, t, y, fy, user_data):  # type: ignore
+                params = user_data.params
+                jac_calc(out, t, y, params)
+                if (~np.isfinite(out)).any():
+                    user_data.error_states = y
+                    return 1
+                return 0
+        else:
+            @numba.njit(inline='always')
+            def jac_sparse(out, t, y, fy, user_data):  # type: ignore
+                jac_calc(out, t, y, None)
+                if (~np.isfinite(out)).any():
+                    user_data.error_states = y
+                    return 1
+                return 0
+
+        return jac_sparse
+
     def make_rhs_jac_prod(self, *, debug=False):  # type: ignore
         jacprod = self._sym_dydt_jac @ self._sym_lamda
         calc_jac_prod = lambdify_consts(
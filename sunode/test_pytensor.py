@@ -3,6 +3,25 @@ import pytensor
 import pytensor.tensor as pt
 
 import sunode.wrappers
+from sunode import SympyProblem
+from sunode.solver import Solver
+from sunode.wrappers.as_pytensor import SolveODEBatch
+
+
+def make_decay_problem(derivative_params=[('b',)]):
+    def rhs(t, y, p):
+        return {
+            'x': -p.b * y.x,
+        }
+
+    states = {
+        'x': (),
+    }
+
+    params = {
+        'b': ()
+    }
+    return SympyProblem(params, states, rhs, derivative_params=derivative_params)
 
 
 def test_nodiff_params():
@@ -62,3 +81,133 @@ def test_nodiff_params():
     func = pytensor.function([A, beta], [solution["A"], solution["B"], grad])
     assert func(0.2, 1.)[0].shape == (5,)
     assert func(0.2, 1.)[2].shape == (5,)
+
+
+def test_lazy_flat_solution_symbolic():
+    def dydt_dict(t, y, p):
+        return {
+            'x': {'y': -p.b * y.x.y},
+            'z': -y.z,
+        }
+
+    b = pt.dscalar('b')
+
+    y0 = {
+        'x': {'y': np.ones(2)},
+        'z': np.array(1.),
+    }
+    params = {
+        'b': b,
+        'extra': np.array([0.]),
+    }
+
+    tvals = np.linspace(0, 1, 5)
+    solution, *_ = sunode.wrappers.as_pytensor.solve_ivp(
+        y0=y0,
+        params=params,
+        rhs=dydt_dict,
+        tvals=tvals,
+        t0=0.,
+        derivatives='adjoint',
+    )
+
+    assert len(solution) == 2
+    assert set(solution) == {'x', 'z'}
+
+    nested = solution['x']
+    assert set(nested) == {'y'}
+    assert isinstance(solution['z'], pt.TensorVariable)
+    assert isinstance(nested['y'], pt.TensorVariable)
+
+    func = pytensor.function([b], [solution['z'], nested['y']])
+    z_vals, y_vals = func(0.5)
+    assert y_vals.shape == (5, 2)
+    np.testing.assert_allclose(z_vals, np.exp(-tvals), rtol=1e-5)
+    np.testing.assert_allclose(y_vals[:, 0], np.exp(-0.5 * tvals), rtol=1e-5)
+
+
+def test_adjoint_gradient_cache():
+    def dydt_dict(t, y, p):
+        return {
+            'x': -p.b * y.x,
+        }
+
+    def make_grad_func():
+        x0 = pt.dscalar('x0')
+        b = pt.dscalar('b')
+
+        y0 = {
+            'x': (x0, ()),
+        }
+        params = {
+            'alpha': np.array(1.),
+            'b': b,
+            'extra': np.array([0.]),
+        }
+
+        solution, _, _, sol, *_ = sunode.wrappers.as_pytensor.solve_ivp(
+            y0=y0,
+            params=params,
+            rhs=dydt_dict,
+            tvals=np.linspace(0, 1, 5),
+            t0=0.,
+            derivatives='adjoint',
+        )
+        loss = (solution['x'] ** 2).sum()
+        grads = pt.grad(loss, [x0, b])
+        return pytensor.function([x0, b], [loss] + grads), sol
+
+    def reference(x0_val, b_val):
+        # A freshly built solver has no cached forward solve.
+        ref_func, _ = make_grad_func()
+        return ref_func(x0_val, b_val)
+
+    func, sol = make_grad_func()
+
+    # Repeated evaluations with identical inputs skip the forward solve.
+    first = func(1., 0.5)
+    for _ in range(3):
+        for res, ref in zip(func(1., 0.5), first):
+            np.testing.assert_allclose(res, ref)
+
+    # Changing y0 or the parameters must invalidate the cache.
+    for args in [(2., 0.5), (2., 1.5), (1., 0.5)]:
+        for res, ref in zip(func(*args), reference(*args)):
+            np.testing.assert_allclose(res, ref)
+
+    # Changing the parameters behind the Op's back must as well.
+    record = sol.get_params()
+    record['b'] = 100.
+    sol.set_params(record)
+    for res, ref in zip(func(1., 0.5), first):
+        np.testing.assert_allclose(res, ref)
+
+
+def test_solve_ode_batch():
+    problem = make_decay_problem()
+    solver = Solver(problem)
+    op = SolveODEBatch(solver)
+
+    y0 = pt.dmatrix('y0')
+    params = pt.dmatrix('params')
+    params_fixed = pt.dvector('params_fixed')
+    t0 = pt.dscalar('t0')
+    tvals = pt.dvector('tvals')
+    func = pytensor.function(
+        [y0, params, params_fixed, t0, tvals],
+        op(y0, params, params_fixed, t0, tvals),
+    )
+
+    y0_vals = np.array([[1.], [2.], [3.]])
+    b_vals = np.array([[0.5], [1.], [2.]])
+    tvals_np = np.linspace(0, 1, 11)
+    result = func(y0_vals, b_vals, np.zeros(0), 0., tvals_np)
+
+    expected = np.empty_like(result)
+    ref_solver = Solver(problem)
+    for i in range(len(y0_vals)):
+        ref_solver.set_params_dict({'b': b_vals[i, 0]})
+        y_out = ref_solver.make_output_buffers(tvals_np)
+        ref_solver.solve(0., tvals_np, y0_vals[i], y_out)
+        expected[i] = y_out
+    np.testing.assert_allclose(result, expected, rtol=1e-6)
@@ -1,7 +1,24 @@
 import numpy as np
+import pytest
 
 from sunode import SympyProblem
-from sunode.solver import Solver, AdjointSolver
+from sunode.solver import Solver, AdjointSolver, SolverError
+
+
+def make_decay_problem(derivative_params=[]):
+    def rhs(t, y, p):
+        return {
+            'x': -p.b * y.x,
+        }
+
+    states = {
+        'x': (),
+    }
+
+    params = {
+        'b': ()
+    }
+    return SympyProblem(params, states, rhs, derivative_params=derivative_params)
 
 
 def test_basic():
@@ -171,7 +188,7 @@ def test_linear_solver_kwarg():
         'b': 0.2
     }
     problem = SympyProblem(params, states, rhs, derivative_params=[])
-    linear_solver_opts = ["dense", "dense_finitediff", "spgmr_finitediff", "spgmr", "band"]
+    linear_solver_opts = ["dense", "dense_finitediff", "spgmr_finitediff", "spgmr", "band", "klu"]
     for linear_solver in linear_solver_opts:
         if linear_solver == "band":
             linear_solver_kwargs = {"upper_bandwidth": 1, "lower_bandwidth": 1}
@@ -179,3 +196,165 @@ def test_linear_solver_kwarg():
             linear_solver_kwargs = {}
         solver = Solver(problem, linear_solver=linear_solver, linear_solver_kwargs=linear_solver_kwargs)
         check_call_solve(solver, param_vals, None)
+
+
+def test_solve_matches_analytic():
+    problem = make_decay_problem()
+    solver = Solver(problem)
+    solver.set_params_dict({'b': 0.5})
+
+    tvals = np.linspace(0, 1, 11)
+    y_out = solver.make_output_buffers(tvals)
+    solver.solve(0., tvals, np.array([1.]), y_out)
+    np.testing.assert_allclose(y_out[:, 0], np.exp(-0.5 * tvals), rtol=1e-6)
+
+
+def test_solve_single_time():
+    problem = make_decay_problem()
+    solver = Solver(problem)
+    solver.set_params_dict({'b': 0.5})
+
+    tvals = np.array([1.])
+    y_out = solver.make_output_buffers(tvals)
+    solver.solve(0., tvals, np.array([1.]), y_out)
+    np.testing.assert_allclose(y_out[0, 0], np.exp(-0.5), rtol=1e-6)
+
+
+def test_solve_forward_single_time():
+    problem = make_decay_problem(derivative_params=[('b',)])
+    solver = AdjointSolver(problem)
+    solver.set_params_dict({'b': 0.5})
+
+    tvals = np.array([1.])
+    y_out, _, _ = solver.make_output_buffers(tvals)
+    solver.solve_forward(0., tvals, np.array([1.]), y_out)
+    np.testing.assert_allclose(y_out[0, 0], np.exp(-0.5), rtol=1e-6)
+
+
+def test_solve_many():
+    problem = make_decay_problem()
+    solver = Solver(problem)
+
+    tvals = np.linspace(0, 1, 11)
+    y0 = np.array([[1.], [2.], [3.]])
+    b_vals = [0.5, 1., 2.]
+
+    records = []
+    for b in b_vals:
+        solver.set_params_dict({'b': b})
+        records.append(solver.get_params())
+
+    y_out = np.empty((len(b_vals), len(tvals), 1))
+    solver.solve_many(0., tvals, y0, y_out, params=records)
+
+    for k, record in enumerate(records):
+        solver.set_params(record)
+        expected = solver.make_output_buffers(tvals)
+        solver.solve(0., tvals, y0[k], expected)
+        np.testing.assert_allclose(y_out[k], expected)
+
+
+def test_solve_many_sens():
+    problem = make_decay_problem(derivative_params=[('b',)])
+    solver = Solver(problem, sens_mode='simultaneous')
+    solver.set_params_dict({'b': 0.5})
+
+    tvals = np.linspace(0, 1, 11)
+    y0 = np.array([[1.], [2.]])
+    y_tmpl, sens_tmpl = solver.make_output_buffers(tvals)
+    y_out = np.empty((len(y0),) + y_tmpl.shape)
+    sens_out = np.empty((len(y0),) + sens_tmpl.shape)
+    sens0 = np.zeros((len(y0),) + sens_tmpl[0].shape)
+    solver.solve_many(0., tvals, y0, y_out, sens0=sens0, sens_out=sens_out)
+
+    for k in range(len(y0)):
+        y_ref, sens_ref = solver.make_output_buffers(tvals)
+        solver.solve(0., tvals, y0[k], y_ref, sens0=sens0[k], sens_out=sens_ref)
+        np.testing.assert_allclose(y_out[k], y_ref)
+        np.testing.assert_allclose(sens_out[k], sens_ref)
+
+
+def test_solve_sens_dtype():
+    problem = make_decay_problem(derivative_params=[('b',)])
+    solver = Solver(problem, sens_mode='simultaneous')
+    solver.set_params_dict({'b': 0.5})
+
+    tvals = np.linspace(0, 1, 11)
+
+    y64, s64 = solver.make_output_buffers(tvals)
+    solver.solve(0., tvals, np.array([1.]), y64,
+                 sens0=np.zeros_like(s64[0]), sens_out=s64)
+
+    y32, s32 = solver.make_output_buffers(tvals, sens_dtype=np.float32)
+    assert s32.dtype == np.float32
+    solver.solve(0., tvals, np.array([1.]), y32,
+                 sens0=np.zeros_like(s64[0]), sens_out=s32)
+
+    np.testing.assert_allclose(y32, y64)
+    np.testing.assert_allclose(s32, s64, rtol=1e-4)
+
+
+def test_flat_solution_as_dict():
+    def rhs(t, y, p):
+        return {
+            'x': {'y': -p.b * y.x.y},
+            'z': -y.z,
+        }
+
+    states = {
+        'x': {
+            'y': (2,),
+        },
+        'z': (),
+    }
+
+    params = {
+        'b': ()
+    }
+    problem = SympyProblem(params, states, rhs, derivative_params=[])
+    solver = Solver(problem)
+    solver.set_params_dict({'b': 0.5})
+
+    tvals = np.linspace(0, 1, 11)
+    y_out = solver.make_output_buffers(tvals)
+    solver.solve(0., tvals, np.ones(3), y_out)
+
+    solution = problem.flat_solution_as_dict(y_out)
+    assert len(solution) == 2
+    assert set(solution) == {'x', 'z'}
+
+    nested = solution['x']
+    assert set(nested) == {'y'}
+    assert nested['y'].shape == (11, 2)
+    np.testing.assert_allclose(nested['y'][:, 0], np.exp(-0.5 * tvals), rtol=1e-6)
+    np.testing.assert_allclose(solution['z'], np.exp(-tvals), rtol=1e-6)
+
+    plain = solution.copy()
+    assert isinstance(plain, dict)
+    assert isinstance(plain['x'], dict)
+    np.testing.assert_allclose(plain['x']['y'], nested['y'])
+
+
+def test_solve_failure_reports_time():
+    def rhs(t, y, p):
+        return {
+            'x': p.b * y.x * y.x,
+        }
+
+    states = {
+        'x': (),
+    }
+
+    params = {
+        'b': ()
+    }
+    problem = SympyProblem(params, states, rhs, derivative_params=[])
+    solver = Solver(problem)
+    solver.set_params_dict({'b': 1.})
+
+    # The solution 1 / (1 - t) blows up at t = 1, so the first
+    # output time can be reached but the second cannot.
+    tvals = np.array([0.5, 2.])
+    y_out = solver.make_output_buffers(tvals)
+    with pytest.raises(SolverError, match='time=2.0'):
+        solver.solve(0., tvals, np.array([1.]), y_out)
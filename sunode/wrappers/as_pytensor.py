@@ -17,6 +17,88 @@ import sunode.symode.problem
 from sunode.symode.problem import SympyProblem
 
 
+def _set_output(outputs, i, values):
+    """Copy values into the i-th output, reusing its storage if possible."""
+    out = outputs[i][0]
+    if out is None or out.shape != values.shape:
+        out = np.empty_like(values)
+    np.copyto(out, values)
+    outputs[i][0] = out
+
+
+def _set_output_nan(outputs, i, template):
+    """Fill the i-th output with nan, leaving the template buffer alone.
+
+    Failed solves report a full-nan result, writing the nans straight
+    into the output storage avoids filling the internal buffer only to
+    copy it right after.
+    """
+    out = outputs[i][0]
+    if out is None or out.shape != template.shape:
+        out = np.empty_like(template)
+    out.fill(np.nan)
+    outputs[i][0] = out
+
+
+def _concat_flattened(flat_tensors, paths):
+    """Flatten and join the tensors at the given paths into one vector."""
+    vars = []
+    for path in paths:
+        tensor = flat_tensors[path]
+        if isinstance(tensor, tuple):
+            tensor, _ = tensor
+        if not isinstance(tensor, Variable):
+            tensor = pt.as_tensor_variable(tensor, dtype="float64")
+        vars.append(tensor.flatten())
+    if not vars:
+        return pt.as_tensor_variable(np.zeros(0), dtype="float64")
+    if len(vars) == 1:
+        return vars[0]
+    return pt.concatenate(vars)
+
+
+def _make_apply_params(solver):
+    """Bind the parameter update of a solver into a single closure.
+
+    The bound methods are looked up once, so the Op's perform method
+    only pays for one function call per evaluation instead of repeated
+    attribute resolution. Empty parameter subsets are dropped from the
+    closure entirely: viewing a length-0 input as an empty struct dtype
+    is invalid, and there is nothing to update anyway.
+    """
+    set_deriv = solver.set_derivative_params_raw
+    set_fixed = solver.set_remaining_params_raw
+    has_deriv = solver.derivative_params_dtype.itemsize > 0
+    has_fixed = solver.remainder_params_dtype.itemsize > 0
+
+    if has_deriv and has_fixed:
+        def apply_params(params, params_fixed):
+            set_deriv(params)
+            set_fixed(params_fixed)
+    elif has_deriv:
+        def apply_params(params, params_fixed):
+            set_deriv(params)
+    elif has_fixed:
+        def apply_params(params, params_fixed):
+            set_fixed(params_fixed)
+    else:
+        def apply_params(params, params_fixed):
+            pass
+
+    return apply_params
+
+
+def _forward_key(y0, params, params_fixed, t0, tvals):
+    """Identify a forward solve by the values of its inputs."""
+    return (
+        y0.tobytes(),
+        params.tobytes(),
+        params_fixed.tobytes(),
+        float(t0),
+        tvals.tobytes(),
+    )
+
+
 def solve_ivp(
     t0: float,
     y0: np.ndarray,
@@ -38,33 +120,47 @@ def solve_ivp(
         params = params.copy()
         params["__initial_values"] = y0
 
-    def read_dict(vals, name=None):
-        if isinstance(vals, dict):
-            return {name: read_dict(item, name) for name, item in vals.items()}
+    def read_leaf(vals, name):
+        if isinstance(vals, tuple):
+            tensor, dim_names = vals
         else:
-            if isinstance(vals, tuple):
-                tensor, dim_names = vals
-            else:
-                tensor, dim_names = vals, pt.as_tensor_variable(vals, dtype="float64").type.shape
-                if any(d is None for d in dim_names):
-                    raise ValueError(
-                        'Shapes of tensors need to be statically known or given explicitly.'
-                    )
-            if isinstance(dim_names, (str, int)):
-                dim_names = (dim_names,)
-            tensor = pt.as_tensor_variable(tensor, dtype="float64")
-            if tensor.ndim != len(dim_names):
-                raise ValueError(
-                    f"Dimension mismatch for {name}: Value has rank {tensor.ndim}, "
-                    f"but {len(dim_names)} was specified."
-                )
-            assert np.dtype(tensor.dtype) == dtype, tensor
-            tensor_dtype = np.dtype(tensor.dtype)
-            if tensor_dtype != dtype:
+            tensor, dim_names = vals, pt.as_tensor_variable(vals, dtype="float64").type.shape
+            if any(d is None for d in dim_names):
                 raise ValueError(
-                    f"Dtype mismatch for {name}: Got {tensor_dtype} but expected {dtype}."
+                    'Shapes of tensors need to be statically known or given explicitly.'
                 )
-            return dim_names
+        if isinstance(dim_names, (str, int)):
+            dim_names = (dim_names,)
+        tensor = pt.as_tensor_variable(tensor, dtype="float64")
+        if tensor.ndim != len(dim_names):
+            raise ValueError(
+                f"Dimension mismatch for {name}: Value has rank {tensor.ndim}, "
+                f"but {len(dim_names)} was specified."
+            )
+        assert np.dtype(tensor.dtype) == dtype, tensor
+        tensor_dtype = np.dtype(tensor.dtype)
+        if tensor_dtype != dtype:
+            raise ValueError(
+                f"Dtype mismatch for {name}: Got {tensor_dtype} but expected {dtype}."
+            )
+        return dim_names
+
+    def read_dict(vals):
+        # Walk the nested dict with an explicit stack, recursing into
+        # every leaf would pay python call overhead per level.
+        if type(vals) is not dict:
+            return read_leaf(vals, None)
+        dims = {}
+        stack = [(vals, dims)]
+        while stack:
+            current, target = stack.pop()
+            for name, item in current.items():
+                if type(item) is dict:
+                    target[name] = subdims = {}
+                    stack.append((item, subdims))
+                else:
+                    target[name] = read_leaf(item, name)
+        return dims
 
     y0_dims = read_dict(y0)
     params_dims = read_dict(params)
@@ -83,37 +179,24 @@ def solve_ivp(
     problem = symode.problem.SympyProblem(
         params_dims, y0_dims, rhs, derivative_subset, coords=coords, simplify=simplify)
 
+    # Join the derivative and fixed parameters in one go and slice the
+    # two subvectors out afterwards, so the graph only contains a
+    # single join node for all parameters.
     flat_tensors = as_flattened(params)
-    vars = []
-    for path in problem.params_subset.subset_paths:
-        tensor = flat_tensors[path]
-        if isinstance(tensor, tuple):
-            tensor, _ = tensor
-        vars.append(pt.as_tensor_variable(tensor, dtype="float64").reshape((-1,)))
-    if vars:
-        params_subs_flat = pt.concatenate(vars)
-    else:
-        params_subs_flat = pt.as_tensor_variable(np.zeros(0), dtype="float64")
-
-    vars = []
-    for path in problem.params_subset.remainder.subset_paths:
-        tensor = flat_tensors[path]
-        if isinstance(tensor, tuple):
-            tensor, _ = tensor
-        vars.append(pt.as_tensor_variable(tensor, dtype="float64").reshape((-1,)))
-    if vars:
-        params_remaining_flat = pt.concatenate(vars)
-    else:
-        params_remaining_flat = pt.as_tensor_variable(np.zeros(0), dtype="float64")
-
-    flat_tensors = as_flattened(y0)
-    vars = []
-    for path in problem.state_subset.paths:
-        tensor = flat_tensors[path]
-        if isinstance(tensor, tuple):
-            tensor, _ = tensor
-        vars.append(pt.as_tensor_variable(tensor, dtype="float64").reshape((-1,)))
-    y0_flat = pt.concatenate(vars)
+    subset = problem.params_subset
+    n_deriv = sum(
+        np.prod(shape, dtype=int)
+        for path, shape in subset.flat_shapes.items()
+        if path in subset.subset_paths
+    )
+    params_all_flat = _concat_flattened(
+        flat_tensors,
+        list(subset.subset_paths) + list(subset.remainder.subset_paths),
+    )
+    params_subs_flat = params_all_flat[:n_deriv]
+    params_remaining_flat = params_all_flat[n_deriv:]
+
+    y0_flat = _concat_flattened(as_flattened(y0), problem.state_subset.paths)
 
     t0 = pt.as_tensor_variable(t0, dtype="float64")
     tvals = pt.as_tensor_variable(tvals, dtype="float64")
@@ -148,8 +231,7 @@ class EvalRhs(Op):
         self._solver = solver
         self._solver_id = id(solver)
 
-        self._deriv_dtype = self._solver.derivative_params_dtype
-        self._fixed_dtype = self._solver.remainder_params_dtype
+        self._apply_params = _make_apply_params(solver)
 
         # We only compile this when it is used, because we only need
         # to evaluate this op if we need derivative with respect to
@@ -163,8 +245,7 @@ class EvalRhs(Op):
         if self._rhs is None:
             self._rhs = self._solver._problem.make_rhs()
 
-        self._solver.set_derivative_params(params.view(self._deriv_dtype)[0])
-        self._solver.set_remaining_params(params_fixed.view(self._fixed_dtype)[0])
+        self._apply_params(params, params_fixed)
 
         ok = True
         retcode = 0
@@ -195,8 +276,8 @@ class SolveODE(Op):
         self._solver = solver
         self._solver_id = id(solver)
 
-        self._deriv_dtype = self._solver.derivative_params_dtype
-        self._fixed_dtype = self._solver.remainder_params_dtype
+        self._apply_params = _make_apply_params(solver)
+        self._output_buffers = None
 
         n_states, n_params = self._solver._problem.n_states, self._solver._problem.n_params
         problem = self._solver._problem
@@ -231,10 +312,17 @@ class SolveODE(Op):
 
     def perform(self, node, inputs, outputs):
         y0, params, params_fixed, t0, tvals = inputs
-        y_out, sens_out = self._solver.make_output_buffers(tvals)
 
-        self._solver.set_derivative_params(params.view(self._deriv_dtype)[0])
-        self._solver.set_remaining_params(params_fixed.view(self._fixed_dtype)[0])
+        # The buffers are owned by the Op and reused between calls, so
+        # we only pay for the allocation when the number of time points
+        # changes.
+        buffers = self._output_buffers
+        if buffers is None or len(buffers[0]) != len(tvals):
+            buffers = self._solver.make_output_buffers(tvals)
+            self._output_buffers = buffers
+        y_out, sens_out = buffers
+
+        self._apply_params(params, params_fixed)
 
         try:
             self._solver.solve(
@@ -242,11 +330,12 @@ class SolveODE(Op):
                 sens0=self._sens0, sens_out=sens_out
             )
         except SolverError:
-            y_out[...] = np.nan
-            sens_out[...] = np.nan
+            _set_output_nan(outputs, 0, y_out)
+            _set_output_nan(outputs, 1, sens_out)
+            return
 
-        outputs[0][0] = y_out
-        outputs[1][0] = sens_out
+        _set_output(outputs, 0, y_out)
+        _set_output(outputs, 1, sens_out)
 
     def grad(self, inputs, g):
         g, g_grad = g
@@ -263,6 +352,56 @@ class SolveODE(Op):
         ]
 
 
+class SolveODEBatch(Op):
+    """Solve a batch of initial value problems that share one solver.
+
+    The trajectories share the fixed parameters and the output time
+    grid, but each has its own initial state and derivative parameters,
+    so the solver setup cost is paid once for the whole batch.
+    Gradients are not implemented, use the single-trajectory Ops when
+    derivatives are needed.
+    """
+
+    # y0 and params have one row per trajectory, params_fixed is shared
+    itypes = [pt.dmatrix, pt.dmatrix, pt.dvector, pt.dscalar, pt.dvector]
+    # y_out with shape (n_batch, len(tvals), n_states)
+    otypes = [pt.dtensor3]
+
+    __props__ = ('_solver_id',)
+
+    def __init__(self, solver):
+        self._solver = solver
+        self._solver_id = id(solver)
+        self._apply_params = _make_apply_params(solver)
+        self._y_out = None
+
+    def perform(self, node, inputs, outputs):
+        y0, params, params_fixed, t0, tvals = inputs
+
+        n_batch = len(y0)
+        n_states = self._solver._problem.n_states
+        y_out = self._y_out
+        if y_out is None or y_out.shape != (n_batch, len(tvals), n_states):
+            y_out = np.empty((n_batch, len(tvals), n_states))
+            self._y_out = y_out
+
+        try:
+            for i in range(n_batch):
+                self._apply_params(params[i], params_fixed)
+                self._solver.solve(t0, tvals, y0[i], y_out[i])
+        except SolverError:
+            _set_output_nan(outputs, 0, y_out)
+            return
+
+        _set_output(outputs, 0, y_out)
+
+    def grad(self, inputs, g):
+        return [
+            grad_not_implemented(self, i, input)
+            for i, input in enumerate(inputs)
+        ]
+
+
 class SolveODEAdjoint(Op):
     # y0, params, params_fixed, t0, tvals
     itypes = [pt.dvector, pt.dvector, pt.dvector, pt.dscalar, pt.dvector]
@@ -273,30 +412,41 @@ class SolveODEAdjoint(Op):
     def __init__(self, solver):
         self._solver = solver
         self._solver_id = id(solver)
-        self._deriv_dtype = self._solver.derivative_params_dtype
-        self._fixed_dtype = self._solver.remainder_params_dtype
+        self._apply_params = _make_apply_params(solver)
+        self._output_buffers = None
+
+    def _get_buffers(self, tvals):
+        buffers = self._output_buffers
+        if buffers is None or len(buffers[0]) != len(tvals):
+            buffers = self._solver.make_output_buffers(tvals)
+            self._output_buffers = buffers
+        return buffers
 
     def perform(self, node, inputs, outputs):
         y0, params, params_fixed, t0, tvals = inputs
 
-        y_out, grad_out, lamda_out = self._solver.make_output_buffers(tvals)
+        y_out, grad_out, lamda_out = self._get_buffers(tvals)
 
-        self._solver.set_derivative_params(params.view(self._deriv_dtype)[0])
-        self._solver.set_remaining_params(params_fixed.view(self._fixed_dtype)[0])
+        self._apply_params(params, params_fixed)
 
         try:
             self._solver.solve_forward(t0, tvals, y0, y_out)
         except SolverError as e:
-            y_out[:] = np.nan
+            self._solver._last_forward_key = None
+            _set_output_nan(outputs, 0, y_out)
+            return
 
-        outputs[0][0] = y_out.copy()
+        self._solver._last_forward_key = _forward_key(
+            y0, params, params_fixed, t0, tvals)
+
+        _set_output(outputs, 0, y_out)
 
     def grad(self, inputs, g):
         g, = g
 
         y0, params, params_fixed, t0, tvals = inputs
         solution = self(*inputs)
-        backward = SolveODEAdjointBackward(self._solver)
+        backward = SolveODEAdjointBackward(self._solver, buffer_source=self)
         lamda, gradient = backward(y0, params, params_fixed, g, t0, tvals)
 
         return [
@@ -315,30 +465,50 @@ class SolveODEAdjointBackward(Op):
 
     __props__ = ('_solver_id',)
 
-    def __init__(self, solver):
+    def __init__(self, solver, buffer_source=None):
         self._solver = solver
         self._solver_id = id(solver)
-        self._deriv_dtype = self._solver.derivative_params_dtype
-        self._fixed_dtype = self._solver.remainder_params_dtype
+        self._apply_params = _make_apply_params(solver)
+        # If the Op was created as the gradient of a SolveODEAdjoint,
+        # share that Op's buffers instead of allocating a second set
+        # for the same solver.
+        self._buffer_source = buffer_source
+        self._output_buffers = None
+
+    def _get_buffers(self, tvals):
+        if self._buffer_source is not None:
+            return self._buffer_source._get_buffers(tvals)
+        buffers = self._output_buffers
+        if buffers is None or len(buffers[0]) != len(tvals):
+            buffers = self._solver.make_output_buffers(tvals)
+            self._output_buffers = buffers
+        return buffers
 
     def perform(self, node, inputs, outputs):
         y0, params, params_fixed, grads, t0, tvals = inputs
 
-        y_out, grad_out, lamda_out = self._solver.make_output_buffers(tvals)
+        y_out, grad_out, lamda_out = self._get_buffers(tvals)
 
-        self._solver.set_derivative_params(params.view(self._deriv_dtype)[0])
-        self._solver.set_remaining_params(params_fixed.view(self._fixed_dtype)[0])
+        self._apply_params(params, params_fixed)
 
-        # TODO We don't really need to do the forward solve if we make sure
-        # that it was executed previously, but it isn't very expensive
-        # compared with the backward pass anyway.
+        # If the forward pass already solved with the same inputs, the
+        # checkpoints CVODES wrote during that solve are still valid and
+        # we can go straight to the backward integration. The solver
+        # clears the key whenever its parameters or checkpoints change
+        # behind our back.
+        key = _forward_key(y0, params, params_fixed, t0, tvals)
         try:
-            self._solver.solve_forward(t0, tvals, y0, y_out)
+            if (getattr(self._solver, '_last_forward_key', None) != key
+                    or not self._solver.has_forward_checkpoints()):
+                self._solver.solve_forward(t0, tvals, y0, y_out)
+                self._solver._last_forward_key = key
             self._solver.solve_backward(tvals[-1], t0, tvals,
                                         grads, grad_out, lamda_out)
         except SolverError as e:
-            lamda_out[:] = np.nan
-            grad_out[:] = np.nan
+            self._solver._last_forward_key = None
+            _set_output_nan(outputs, 0, lamda_out)
+            _set_output_nan(outputs, 1, grad_out)
+            return
 
-        outputs[0][0] = lamda_out
-        outputs[1][0] = grad_out
+        _set_output(outputs, 0, lamda_out)
+        _set_output(outputs, 1, grad_out)